@@ -0,0 +1,312 @@
+"""Line up medication log events with mood data from the journal.
+
+Answers "did my mood shift after the regimen change?": every dose change in
+assets/log.json is joined against the journal's mood snapshots and tagged
+entries in a window before and after it.
+
+Run headless with `python insights.py`, or from the logger's Insights button.
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+from locking import file_lock, file_version
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_FILE = os.path.join(_BASE_DIR, "assets", "log.json")
+JOURNAL_FILE = os.path.normpath(os.path.join(
+	_BASE_DIR, os.pardir, "hrt personal journal-diary", "entrys", "hrt_journal_data.json"))
+
+METRICS = ("mood", "dysphoria", "euphoria")
+DEFAULT_TAGS = ("dysphoria", "euphoria")
+
+
+def _load_json(path, default):
+	if not os.path.exists(path):
+		return default
+	try:
+		with file_lock(path):
+			with open(path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+	except Exception:
+		return default
+	return data if isinstance(data, type(default)) else default
+
+
+def parse_when(date_str, time_str, fallback=""):
+	"""Datetime from YYYY-MM-DD (+ HH:MM), else the ISO `fallback`; None if nothing parses."""
+	date_str = (date_str or "").strip()
+	time_str = (time_str or "").strip()
+	candidates = [(f"{date_str} {time_str}", "%Y-%m-%d %H:%M"), (date_str, "%Y-%m-%d")] if time_str else [(date_str, "%Y-%m-%d")]
+	for value, fmt in candidates:
+		# fromisoformat is far cheaper than strptime, which matters over years of
+		# entries; strptime still takes the unpadded "2024-1-5" / "9:5" the logger accepts
+		try:
+			return datetime.fromisoformat(value)
+		except ValueError:
+			pass
+		try:
+			return datetime.strptime(value, fmt)
+		except ValueError:
+			pass
+	try:
+		return datetime.fromisoformat((fallback or "").strip())
+	except ValueError:
+		return None
+
+
+def metric_value(snapshot, metric):
+	"""The metric as a float, or None if the snapshot does not record it."""
+	value = snapshot.get(metric)
+	if value is None or value == "":
+		return None
+	try:
+		return float(value)
+	except (TypeError, ValueError):
+		return None
+
+
+def _advance(times, i, bound):
+	# merge-join pointer: first index at or after i with times[index] >= bound
+	while i < len(times) and times[i] < bound:
+		i += 1
+	return i
+
+
+def _pearson(xs, ys):
+	n = len(xs)
+	if n < 3:
+		return None
+	mx = sum(xs) / n
+	my = sum(ys) / n
+	sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+	sxx = sum((x - mx) ** 2 for x in xs)
+	syy = sum((y - my) ** 2 for y in ys)
+	if not sxx or not syy:
+		return None
+	return sxy / (sxx * syy) ** 0.5
+
+
+class Insights:
+	"""Sorted, pre-aggregated view of both stores for one data version.
+
+	Results are memoized on the instance; load_insights() hands out the same
+	instance until either file changes.
+	"""
+
+	def __init__(self, log_entries, journal):
+		# (when, name, (dose, unit, route)) per logged medication, oldest first
+		doses = []
+		for entry in log_entries:
+			for med in (entry.get("medications") or []):
+				name = (med.get("name") or "").strip()
+				if not name:
+					continue
+				when = parse_when(entry.get("date"), med.get("time") or entry.get("time"), entry.get("timestamp"))
+				if when is None:
+					continue
+				dose = ((med.get("dose") or "").strip(), (med.get("unit") or "").strip(), (med.get("route") or "").strip())
+				doses.append((when, name, dose))
+		doses.sort(key=lambda d: d[0])
+		self.doses = doses
+
+		snapshots = []
+		for snap in (journal.get("mood_snapshots") or []):
+			when = parse_when("", "", snap.get("timestamp"))
+			if when is not None:
+				snapshots.append((when, [metric_value(snap, m) for m in METRICS]))
+		snapshots.sort(key=lambda s: s[0])
+		self.snapshot_times = [s[0] for s in snapshots]
+		# prefix sums and counts per metric, so any window average is a few
+		# lookups; snapshots missing a metric add to neither
+		self._prefix = {}
+		self._prefix_count = {}
+		for k, metric in enumerate(METRICS):
+			sums = [0.0]
+			counts = [0]
+			for _when, values in snapshots:
+				present = values[k] is not None
+				sums.append(sums[-1] + (values[k] if present else 0.0))
+				counts.append(counts[-1] + present)
+			self._prefix[metric] = sums
+			self._prefix_count[metric] = counts
+		# day ordinal -> [sum, count] per metric
+		self._daily = {}
+		for when, values in snapshots:
+			day = self._daily.setdefault(when.date().toordinal(), [[0.0, 0] for _m in METRICS])
+			for total, value in zip(day, values):
+				if value is not None:
+					total[0] += value
+					total[1] += 1
+
+		self.tag_times = {}
+		for entry in (journal.get("entries") or []):
+			when = parse_when(entry.get("date"), "", entry.get("timestamp"))
+			if when is None:
+				continue
+			for tag in (entry.get("tags") or []):
+				self.tag_times.setdefault(tag.strip().lower(), []).append(when)
+		for times in self.tag_times.values():
+			times.sort()
+
+		self._memo = {}
+
+	def regimen_changes(self):
+		"""Each time a medication is first logged or its dose/unit/route differs from last time."""
+		if "changes" not in self._memo:
+			last = {}
+			changes = []
+			for when, name, dose in self.doses:
+				key = name.lower()
+				if last.get(key) != dose:
+					changes.append((when, name, last.get(key), dose))
+					last[key] = dose
+			self._memo["changes"] = changes
+		return self._memo["changes"]
+
+	def change_windows(self, days=7, tags=DEFAULT_TAGS):
+		"""Average mood metrics and tag counts in the `days` before and after every change.
+
+		Changes and snapshots are both sorted, so the window bounds are found
+		with a merge join: each pointer only ever moves forward.
+		"""
+		memo_key = ("windows", days, tuple(tags))
+		if memo_key in self._memo:
+			return self._memo[memo_key]
+		span = timedelta(days=days)
+		times = self.snapshot_times
+		lo = mid = hi = 0
+		tag_ptrs = {tag: [0, 0, 0] for tag in tags}
+		results = []
+		for when, name, before, after in self.regimen_changes():
+			lo = _advance(times, lo, when - span)
+			mid = _advance(times, max(mid, lo), when)
+			hi = _advance(times, max(hi, mid), when + span)
+			averages = {}
+			for metric in METRICS:
+				sums = self._prefix[metric]
+				counts = self._prefix_count[metric]
+				n_before = counts[mid] - counts[lo]
+				n_after = counts[hi] - counts[mid]
+				avg_before = (sums[mid] - sums[lo]) / n_before if n_before else None
+				avg_after = (sums[hi] - sums[mid]) / n_after if n_after else None
+				averages[metric] = (avg_before, avg_after)
+			counts = {}
+			for tag, ptrs in tag_ptrs.items():
+				tag_times = self.tag_times.get(tag, [])
+				ptrs[0] = _advance(tag_times, ptrs[0], when - span)
+				ptrs[1] = _advance(tag_times, max(ptrs[1], ptrs[0]), when)
+				ptrs[2] = _advance(tag_times, max(ptrs[2], ptrs[1]), when + span)
+				counts[tag] = (ptrs[1] - ptrs[0], ptrs[2] - ptrs[1])
+			results.append({
+				"when": when,
+				"name": name,
+				"before": before,
+				"after": after,
+				"snapshots": (mid - lo, hi - mid),
+				"averages": averages,
+				"tags": counts,
+			})
+		self._memo[memo_key] = results
+		return results
+
+	def lagged_correlations(self, name, metric="dysphoria", max_lag=30):
+		"""Pearson r between a medication's daily dose and the metric `lag` days later.
+
+		The dose is carried forward between log entries; days without a mood
+		snapshot are skipped. Returns [(lag, r or None), ...] for lag 0..max_lag.
+		"""
+		memo_key = ("lag", name.lower(), metric, max_lag)
+		if memo_key in self._memo:
+			return self._memo[memo_key]
+		logged = {}
+		for when, med_name, (dose, _unit, _route) in self.doses:
+			if med_name.lower() != name.lower():
+				continue
+			try:
+				logged[when.date().toordinal()] = float(dose)
+			except ValueError:
+				continue
+		results = []
+		if logged and self._daily:
+			k = METRICS.index(metric)
+			first = min(logged)
+			last = max(max(logged), max(self._daily))
+			dose_by_day = []
+			current = None
+			for day in range(first, last + 1):
+				current = logged.get(day, current)
+				dose_by_day.append(current)
+			mood_days = sorted(d for d in self._daily if d >= first and self._daily[d][k][1])
+			mood_values = [self._daily[d][k][0] / self._daily[d][k][1] for d in mood_days]
+			for lag in range(max_lag + 1):
+				pairs = [(dose_by_day[d - lag - first], v) for d, v in zip(mood_days, mood_values) if d - lag >= first]
+				xs = [x for x, _y in pairs]
+				ys = [y for _x, y in pairs]
+				results.append((lag, _pearson(xs, ys)))
+		self._memo[memo_key] = results
+		return results
+
+	def summary_lines(self, days=7, max_lag=30):
+		"""Human-readable report used by the GUI and the command line."""
+		lines = [f"Dose changes vs. mood, {days} days before -> after", ""]
+		windows = self.change_windows(days)
+		if not windows:
+			lines.append("No medication entries found.")
+		for w in reversed(windows):
+			before = " ".join(p for p in (w["before"] or ()) if p) or "(new)"
+			after = " ".join(p for p in w["after"] if p)
+			lines.append(f"{w['when']:%Y-%m-%d}  {w['name']}: {before} -> {after}")
+			n_before, n_after = w["snapshots"]
+			if n_before or n_after:
+				parts = []
+				for metric, (a, b) in w["averages"].items():
+					fa = "-" if a is None else f"{a:.1f}"
+					fb = "-" if b is None else f"{b:.1f}"
+					parts.append(f"{metric} {fa} -> {fb}")
+				lines.append(f"    {', '.join(parts)}  (snapshots {n_before} / {n_after})")
+			tag_parts = [f"#{tag} {a} -> {b}" for tag, (a, b) in w["tags"].items() if a or b]
+			if tag_parts:
+				lines.append("    " + ", ".join(tag_parts))
+
+		names = sorted({name for _when, name, _dose in self.doses}, key=str.lower)
+		correlation_lines = []
+		for name in names:
+			for metric in ("dysphoria", "mood"):
+				scored = [(lag, r) for lag, r in self.lagged_correlations(name, metric, max_lag) if r is not None]
+				if scored:
+					lag, r = max(scored, key=lambda lr: abs(lr[1]))
+					correlation_lines.append(f"{name} vs {metric}: strongest r = {r:+.2f} at {lag} day(s) later")
+		if correlation_lines:
+			lines += ["", f"Dose vs. mood correlation (lags 0-{max_lag} days)", ""] + correlation_lines
+		return lines
+
+
+_cache = {}
+
+
+def load_insights(log_file=LOG_FILE, journal_file=JOURNAL_FILE):
+	"""Return an Insights for the current data, reusing the cached one if neither file changed."""
+	key = (log_file, journal_file)
+	versions = (file_version(log_file), file_version(journal_file))
+	cached = _cache.get(key)
+	if cached is not None and cached[0] == versions:
+		return cached[1]
+	insights = Insights(_load_json(log_file, []), _load_json(journal_file, {}))
+	_cache[key] = (versions, insights)
+	return insights
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Compare mood data before and after medication changes.")
+	parser.add_argument("--days", type=int, default=7, help="window size before/after each change (default 7)")
+	parser.add_argument("--max-lag", type=int, default=30, help="largest correlation lag in days (default 30)")
+	parser.add_argument("--log", default=LOG_FILE, help="medication log JSON")
+	parser.add_argument("--journal", default=JOURNAL_FILE, help="journal data JSON")
+	args = parser.parse_args(argv)
+	print("\n".join(load_insights(args.log, args.journal).summary_lines(args.days, args.max_lag)))
+
+
+if __name__ == "__main__":
+	main()
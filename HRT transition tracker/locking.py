@@ -0,0 +1,45 @@
+"""Advisory file locking for the tracker's JSON files.
+
+Imported by both the medication logger and the journal app, so every
+reader and writer of these files follows the same <file>.lock protocol.
+"""
+import contextlib
+import os
+
+if os.name == "nt":
+	import msvcrt
+else:
+	import fcntl
+
+
+@contextlib.contextmanager
+def file_lock(path):
+	"""Exclusive advisory lock for path, held on a sidecar <path>.lock file."""
+	with open(path + ".lock", "a+") as fh:
+		if os.name == "nt":
+			fh.seek(0)
+			while True:
+				try:
+					msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+					break
+				except OSError:
+					continue  # LK_LOCK gives up after ~10s, keep waiting
+		else:
+			fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+		try:
+			yield
+		finally:
+			if os.name == "nt":
+				fh.seek(0)
+				msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+			else:
+				fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def file_version(path):
+	"""Cheap change token for a file (None if it does not exist)."""
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return (st.st_mtime_ns, st.st_size, st.st_ino)
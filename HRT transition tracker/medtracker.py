@@ -1,11 +1,25 @@
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
 import os
 import json
 from datetime import datetime
 
+from locking import file_lock, file_version
+from insights import load_insights
+from suggestions import MedicationHistory
+from report import write_report
+
+# how often an open log viewer checks the file for entries saved by another window
+WATCH_INTERVAL_MS = 1000
+
+
 class DataManager:
-	"""Simple file-backed JSON store for HRT entries (assets/log.json)."""
+	"""Simple file-backed JSON store for HRT entries (assets/log.json).
+
+	Several logger windows may share the file: every read and write happens
+	under file_lock(), writes replace the file atomically, and the entries
+	last read are cached together with the file version they came from.
+	"""
 	def __init__(self, filepath):
 		self.filepath = filepath
 		folder = os.path.dirname(self.filepath)
@@ -14,8 +28,10 @@ class DataManager:
 		if not os.path.exists(self.filepath):
 			with open(self.filepath, "w", encoding="utf-8") as f:
 				json.dump([], f)
+		self._entries = []
+		self._version = None
 
-	def load_hrt_entries(self):
+	def _read(self):
 		try:
 			with open(self.filepath, "r", encoding="utf-8") as f:
 				data = json.load(f)
@@ -23,15 +39,66 @@ class DataManager:
 					return data
 		except Exception:
 			pass
-		with open(self.filepath, "w", encoding="utf-8") as f:
-			json.dump([], f)
+		self._write([])
 		return []
 
+	def _write(self, entries):
+		tmp = self.filepath + ".tmp"
+		with open(tmp, "w", encoding="utf-8") as f:
+			json.dump(entries, f, indent=2, ensure_ascii=False)
+		os.replace(tmp, self.filepath)
+		self._entries = list(entries)
+		self._version = file_version(self.filepath)
+
+	def _refresh(self):
+		# caller holds the lock; only re-parse when someone else wrote the file
+		version = file_version(self.filepath)
+		if version is None or version != self._version:
+			self._entries = self._read()
+			self._version = file_version(self.filepath)
+
+	def load_hrt_entries(self):
+		with file_lock(self.filepath):
+			self._refresh()
+		return list(self._entries)
+
 	def save_hrt_entries(self, entries):
 		if entries is None:
 			entries = []
-		with open(self.filepath, "w", encoding="utf-8") as f:
-			json.dump(entries, f, indent=2, ensure_ascii=False)
+		with file_lock(self.filepath):
+			self._write(entries)
+
+	def append_hrt_entry(self, entry):
+		"""Append one entry without losing entries saved meanwhile by another instance.
+
+		The cached list is only trusted if the file version still matches;
+		otherwise the file is re-read under the lock and the entry is added to
+		that. The entry id is assigned here so it is unique in the merged list.
+
+		Returns (entry, foreign): the saved entry and the entries other
+		instances appended since our last read, found in the same locked
+		section so the change feed cannot miss them.
+		"""
+		with file_lock(self.filepath):
+			known = {e.get("id") for e in self._entries}
+			self._refresh()
+			foreign = [e for e in self._entries if e.get("id") not in known]
+			entries = list(self._entries)
+			entry = {"id": f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{len(entries)}", **entry}
+			entries.append(entry)
+			self._write(entries)
+		return entry, foreign
+
+	def poll_changes(self):
+		"""Return entries another instance appended since our last read/write.
+
+		Returns None when the file is unchanged (a single stat call). The logger
+		only ever appends, so the change feed is the set of unseen ids.
+		"""
+		if file_version(self.filepath) == self._version:
+			return None
+		known = {e.get("id") for e in self._entries}
+		return [e for e in self.load_hrt_entries() if e.get("id") not in known]
 
 class HRTLogPage(ctk.CTkFrame):
 	"""Concise hormone therapy medication logger."""
@@ -72,13 +139,20 @@ class HRTLogPage(ctk.CTkFrame):
 		self.time_var = ctk.StringVar()
 		self.notes_var = ctk.StringVar()
 		self.med_rows = []
+		self.history = MedicationHistory(self.data_manager.load_hrt_entries())
+		self.template_var = ctk.StringVar(value="Repeat last")
 		self._log_window = None  # NEW: keep reference to View Log window
+		self._log_textbox = None
+		self._insights_window = None
+		self._report_window = None
+		self._render_cache = {}  # (entry id, timestamp) -> formatted viewer block
 
 		# build UI
 		self.columnconfigure(0, weight=1)
 		self._build_ui()
 		self._prefill_date_time()
 		self._add_med_row()  # start with one row
+		self.after(WATCH_INTERVAL_MS, self._watch_log)
 
 	def _build_ui(self):
 		row = 0
@@ -106,7 +180,10 @@ class HRTLogPage(ctk.CTkFrame):
 		meds_header.grid(row=row, column=0, padx=12, pady=(8,4), sticky="ew")
 		meds_header.columnconfigure(0, weight=1)
 		ctk.CTkLabel(meds_header, text="Medications", font=ctk.CTkFont(size=14, weight="bold")).grid(row=0, column=0, sticky="w")
-		ctk.CTkButton(meds_header, text="+ Add", width=80, command=self._add_med_row).grid(row=0, column=1, sticky="e")
+		self.template_menu = ctk.CTkOptionMenu(meds_header, variable=self.template_var, width=160, command=self._apply_template)
+		self.template_menu.grid(row=0, column=1, padx=(0,8), sticky="e")
+		self._refresh_templates()
+		ctk.CTkButton(meds_header, text="+ Add", width=80, command=self._add_med_row).grid(row=0, column=2, sticky="e")
 		row += 1
 
 		# meds container
@@ -127,6 +204,10 @@ class HRTLogPage(ctk.CTkFrame):
 		save_row.columnconfigure(0, weight=1)
 
 		ctk.CTkButton(save_row, text="View Log", width=120, command=self._view_log).grid(row=0, column=0, sticky="w")
+		tools = ctk.CTkFrame(save_row, fg_color="transparent")
+		tools.grid(row=0, column=0)
+		ctk.CTkButton(tools, text="Insights", width=120, command=self._view_insights).pack(side="left", padx=4)
+		ctk.CTkButton(tools, text="Report", width=120, command=self._open_report_dialog).pack(side="left", padx=4)
 		ctk.CTkButton(save_row, text="Save Entry", width=120, command=self._save_entry).grid(row=0, column=0, sticky="e")
 
 	def _prefill_date_time(self):
@@ -135,17 +216,18 @@ class HRTLogPage(ctk.CTkFrame):
 		self.time_var.set(now.strftime("%H:%M"))
 
 	# minimal med row management
-	def _add_med_row(self):
+	def _add_med_row(self, med=None):
+		med = med or {}
 		index = len(self.med_rows)
 		frame = ctk.CTkFrame(self.meds_container)
 		frame.grid(row=index, column=0, pady=4, sticky="ew")
 		frame.columnconfigure(7, weight=1)  # was 6
 
-		name_var = ctk.StringVar()
-		dose_var = ctk.StringVar()
-		unit_var = ctk.StringVar(value=self.unit_options[0])
+		name_var = ctk.StringVar(value=med.get("name", ""))
+		dose_var = ctk.StringVar(value=med.get("dose", ""))
+		unit_var = ctk.StringVar(value=med.get("unit") or self.unit_options[0])
 		time_var = ctk.StringVar()
-		route_var = ctk.StringVar(value=self.route_options[0])
+		route_var = ctk.StringVar(value=med.get("route") or self.route_options[0])
 
 		# name dropdown
 		name = ctk.CTkComboBox(frame, values=self.medication_options, variable=name_var, width=160)
@@ -161,6 +243,11 @@ class HRTLogPage(ctk.CTkFrame):
 		route = ctk.CTkComboBox(frame, values=self.route_options, variable=route_var, width=100)
 		route.grid(row=0, column=4, padx=4, sticky="w")
 
+		self._bind_suggestions(name, name_var, "name", self.medication_options)
+		self._bind_suggestions(dose, dose_var, "dose", self.dose_number_options)
+		self._bind_suggestions(unit, unit_var, "unit", self.unit_options)
+		self._bind_suggestions(route, route_var, "route", self.route_options)
+
 		rm = ctk.CTkButton(frame, text="Remove", width=80, command=lambda f=frame: self._remove_med_row(f))
 		rm.grid(row=0, column=5, padx=4, sticky="e")
 
@@ -173,6 +260,31 @@ class HRTLogPage(ctk.CTkFrame):
 			"route_var": route_var,
 		})
 
+	def _bind_suggestions(self, combo, var, field, defaults):
+		# dropdown lists history matches (most used / most recent first) for what's typed so far;
+		# the variable changes on typing, on picking an item and when a template fills the row
+		def _update(*_args):
+			combo.configure(values=self.history.suggest_for_text(field, var.get(), defaults))
+
+		_update()
+		var.trace_add("write", _update)
+
+	def _refresh_templates(self):
+		self._templates = dict(self.history.templates())
+		self.template_menu.configure(values=list(self._templates) or ["(no saved regimens yet)"])
+		self.template_var.set("Repeat last")
+
+	def _apply_template(self, label):
+		meds = self._templates.get(label)
+		self.template_var.set("Repeat last")
+		if not meds:
+			return
+		for r in list(self.med_rows):
+			r["frame"].destroy()
+		self.med_rows.clear()
+		for med in meds:
+			self._add_med_row(med)
+
 	def _remove_med_row(self, frame):
 		# find and remove corresponding entry
 		for r in list(self.med_rows):
@@ -221,18 +333,18 @@ class HRTLogPage(ctk.CTkFrame):
 			messagebox.showwarning("Validation error", "Enter at least one medication (name/dose/time).")
 			return
 
-		entries = self.data_manager.load_hrt_entries()
-		now = datetime.now()
 		entry = {
-			"id": f"{now.strftime('%Y%m%d%H%M%S')}-{len(entries)}",
 			"date": date_str,
 			"time": time_str,
 			"notes": notes,
 			"medications": meds,
-			"timestamp": now.isoformat(timespec="seconds"),
+			"timestamp": datetime.now().isoformat(timespec="seconds"),
 		}
-		entries.append(entry)
-		self.data_manager.save_hrt_entries(entries)
+		entry, foreign = self.data_manager.append_hrt_entry(entry)
+		self._absorb_foreign_entries(foreign + [entry])
+		if self._log_window_open():
+			# other windows' saves picked up while appending go in first, keeping the viewer in order
+			self._prepend_log_entries(foreign + [entry])
 
 		messagebox.showinfo("Saved", "Entry saved.")
 		self._reset_form()
@@ -246,6 +358,34 @@ class HRTLogPage(ctk.CTkFrame):
 		self._add_med_row()
 
 	def _format_entry_for_view(self, entry: dict) -> str:
+		# entries are append-only and get a unique id when saved, so (id, timestamp)
+		# identifies a block; entries without an id (older logs) are not cached
+		entry_id = entry.get("id")
+		if entry_id is None:
+			return self._render_entry(entry)
+		key = (entry_id, entry.get("timestamp"))
+		text = self._render_cache.get(key)
+		if text is None:
+			text = self._render_entry(entry)
+			self._render_cache[key] = text
+		return text
+
+	def _format_log_text(self, entries) -> str:
+		"""Viewer text for the whole log, newest first; drops cached blocks no longer in it."""
+		old_cache = self._render_cache
+		self._render_cache = {}
+		blocks = []
+		for e in reversed(entries):
+			key = (e.get("id"), e.get("timestamp"))
+			text = old_cache.get(key)
+			if text is not None:
+				self._render_cache[key] = text
+			else:
+				text = self._format_entry_for_view(e)
+			blocks.append(text)
+		return "\n\n".join(blocks)
+
+	def _render_entry(self, entry: dict) -> str:
 		date_str = (entry.get("date") or "").strip()
 		time_str = (entry.get("time") or "").strip()
 		header = f"{date_str} {time_str}".strip() or (entry.get("timestamp") or "").strip() or "(no date/time)"
@@ -267,22 +407,50 @@ class HRTLogPage(ctk.CTkFrame):
 
 		return "\n".join(lines)
 
-	def _view_log(self):
-		entries = self.data_manager.load_hrt_entries()
-		if not entries:
-			messagebox.showinfo("View Log", "No saved entries found.")
-			return
+	def _log_window_open(self):
+		return self._log_window is not None and self._log_window.winfo_exists()
 
-		# newest first
+	def _watch_log(self):
+		# change feed: pick up entries saved by another window (one stat call when nothing changed)
+		try:
+			added = self.data_manager.poll_changes()
+			if added:
+				self._absorb_foreign_entries(added)
+				if self._log_window_open():
+					self._prepend_log_entries(added)
+		finally:
+			self.after(WATCH_INTERVAL_MS, self._watch_log)
+
+	def _absorb_foreign_entries(self, entries):
+		# keep suggestions and "Repeat last" current with other windows' saves
+		for e in entries:
+			self.history.add_entry(e)
+		self._refresh_templates()
+
+	def _prepend_log_entries(self, entries):
+		tb = self._log_textbox
+		if tb is None or not entries:
+			return
 		text = "\n\n".join(self._format_entry_for_view(e) for e in reversed(entries))
+		tb.configure(state="normal")
+		tb.insert("1.0", text + "\n\n")
+		tb.configure(state="disabled")
 
-		# NEW: if already open, just focus it
-		if self._log_window is not None and self._log_window.winfo_exists():
+	def _view_log(self):
+		# NEW: if already open, just focus it (the change feed keeps it current)
+		if self._log_window_open():
 			self._log_window.deiconify()
 			self._log_window.lift()
 			self._log_window.focus_force()
 			return
 
+		entries = self.data_manager.load_hrt_entries()
+		if not entries:
+			messagebox.showinfo("View Log", "No saved entries found.")
+			return
+
+		text = self._format_log_text(entries)
+
 		win = ctk.CTkToplevel(self)
 		self._log_window = win  # keep reference
 		win.title("Saved Logs")
@@ -300,6 +468,7 @@ class HRTLogPage(ctk.CTkFrame):
 			except Exception:
 				pass
 			self._log_window = None
+			self._log_textbox = None
 			win.destroy()
 
 		win.protocol("WM_DELETE_WINDOW", _on_close)
@@ -320,6 +489,95 @@ class HRTLogPage(ctk.CTkFrame):
 
 		tb.insert("1.0", text)
 		tb.configure(state="disabled")
+		self._log_textbox = tb
+
+	def _view_insights(self):
+		# cheap to call repeatedly: results are cached until log.json or the journal changes
+		text = "\n".join(load_insights(self.data_manager.filepath).summary_lines())
+
+		if self._insights_window is not None and self._insights_window.winfo_exists():
+			win = self._insights_window
+			tb = win.textbox
+		else:
+			win = ctk.CTkToplevel(self)
+			self._insights_window = win
+			win.title("Insights")
+			win.geometry("700x500")
+			win.transient(self.winfo_toplevel())
+			tb = ctk.CTkTextbox(win, wrap="none")
+			tb.pack(fill="both", expand=True, padx=12, pady=12)
+			win.textbox = tb
+
+		tb.configure(state="normal")
+		tb.delete("1.0", "end")
+		tb.insert("1.0", text)
+		tb.configure(state="disabled")
+		win.deiconify()
+		win.lift()
+		win.focus_force()
+
+	def _open_report_dialog(self):
+		if self._report_window is not None and self._report_window.winfo_exists():
+			self._report_window.deiconify()
+			self._report_window.lift()
+			self._report_window.focus_force()
+			return
+
+		win = ctk.CTkToplevel(self)
+		self._report_window = win
+		win.title("Clinician report")
+		win.resizable(False, False)
+		win.transient(self.winfo_toplevel())
+
+		start_var = ctk.StringVar()
+		end_var = ctk.StringVar(value=datetime.now().strftime("%Y-%m-%d"))
+		format_var = ctk.StringVar(value="HTML")
+
+		ctk.CTkLabel(win, text="From:").grid(row=0, column=0, padx=(12,4), pady=(12,4), sticky="w")
+		ctk.CTkEntry(win, textvariable=start_var, width=120, placeholder_text="YYYY-MM-DD").grid(row=0, column=1, padx=(0,12), pady=(12,4), sticky="w")
+		ctk.CTkLabel(win, text="To:").grid(row=1, column=0, padx=(12,4), pady=4, sticky="w")
+		ctk.CTkEntry(win, textvariable=end_var, width=120, placeholder_text="YYYY-MM-DD").grid(row=1, column=1, padx=(0,12), pady=4, sticky="w")
+		ctk.CTkLabel(win, text="Format:").grid(row=2, column=0, padx=(12,4), pady=4, sticky="w")
+		ctk.CTkOptionMenu(win, variable=format_var, values=["HTML", "Text"], width=120).grid(row=2, column=1, padx=(0,12), pady=4, sticky="w")
+		ctk.CTkLabel(win, text="Leave From empty to include all history.").grid(row=3, column=0, columnspan=2, padx=12, pady=4, sticky="w")
+
+		def _generate():
+			dates = []
+			for var in (start_var, end_var):
+				value = var.get().strip()
+				try:
+					dates.append(datetime.strptime(value, "%Y-%m-%d").date() if value else None)
+				except ValueError:
+					messagebox.showwarning("Validation error", "Date must be YYYY-MM-DD.", parent=win)
+					return
+			fmt = "html" if format_var.get() == "HTML" else "text"
+			ext = ".html" if fmt == "html" else ".txt"
+			path = filedialog.asksaveasfilename(
+				parent=win,
+				title="Save report",
+				defaultextension=ext,
+				initialfile=f"hrt-report-{datetime.now().strftime('%Y-%m-%d')}{ext}",
+				filetypes=[("HTML", "*.html")] if fmt == "html" else [("Text", "*.txt")],
+			)
+			if not path:
+				return
+			try:
+				with open(path, "w", encoding="utf-8") as out:
+					write_report(out, dates[0], dates[1], fmt, log_file=self.data_manager.filepath)
+			except OSError as e:
+				messagebox.showerror("Report", f"Could not write report:\n{e}", parent=win)
+				return
+			except ValueError as e:
+				# a damaged log or journal; don't leave a report that silently lacks its data
+				try:
+					os.remove(path)
+				except OSError:
+					pass
+				messagebox.showerror("Report", f"Could not read the log or journal (is the file damaged?):\n{e}", parent=win)
+				return
+			messagebox.showinfo("Report", f"Report saved to\n{path}", parent=win)
+
+		ctk.CTkButton(win, text="Save report...", command=_generate).grid(row=4, column=0, columnspan=2, padx=12, pady=(8,12), sticky="ew")
 
 if __name__ == "__main__":
     ctk.set_appearance_mode("System")      # optional
@@ -0,0 +1,358 @@
+"""Printable summary for clinician appointments.
+
+Covers the current regimen, dose changes, adherence gaps and notes from the
+medication log, plus monthly mood trends from the journal, for a date range.
+Both JSON files are streamed item by item and the report is written as it
+is produced, so memory stays bounded however many years of data there are.
+
+Run headless, e.g. `python report.py --from 2024-01-01 --format html -o report.html`,
+or from the logger's Report button.
+"""
+import argparse
+import html
+import json
+import os
+import sys
+from datetime import date, datetime
+
+from insights import JOURNAL_FILE, LOG_FILE, METRICS, metric_value, parse_when
+from locking import file_lock
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _JSONStream:
+	"""Minimal incremental reader: decodes one JSON value at a time from a file."""
+
+	def __init__(self, f, chunk_size=None):
+		self.f = f
+		self.chunk_size = chunk_size or CHUNK_SIZE
+		self.buf = ""
+		self.pos = 0
+		self.eof = False
+		self.decoder = json.JSONDecoder()
+
+	def _fill(self):
+		data = self.f.read(self.chunk_size)
+		if not data:
+			self.eof = True
+			return False
+		self.buf = self.buf[self.pos:] + data
+		self.pos = 0
+		return True
+
+	def peek(self):
+		"""Next non-whitespace character ("" at end of file)."""
+		while True:
+			while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+				self.pos += 1
+			if self.pos < len(self.buf):
+				return self.buf[self.pos]
+			if not self._fill():
+				return ""
+
+	def take(self, expected):
+		if self.peek() != expected:
+			raise ValueError(f"expected {expected!r} at offset {self.pos}")
+		self.pos += 1
+
+	def value(self):
+		self.peek()
+		while True:
+			try:
+				obj, end = self.decoder.raw_decode(self.buf, self.pos)
+			except json.JSONDecodeError:
+				if not self._fill():
+					raise
+				continue
+			# a number running into the end of the buffer (12|3, 4.5|e3) may be cut short
+			is_number = isinstance(obj, (int, float)) and not isinstance(obj, bool)
+			if is_number and not self.eof and (end == len(self.buf) or self.buf[end] in ".eE+-0123456789"):
+				if self._fill():
+					continue
+			self.pos = end
+			return obj
+
+	def items(self):
+		"""Yield the elements of the array starting at the current position."""
+		self.take("[")
+		if self.peek() == "]":
+			self.pos += 1
+			return
+		while True:
+			yield self.value()
+			sep = self.peek()
+			self.pos += 1
+			if sep == "]":
+				return
+			if sep != ",":
+				raise ValueError(f"expected ',' or ']' at offset {self.pos}")
+
+
+def iter_json_array(path, key=None):
+	"""Stream the items of a top-level JSON array, or of the array at data[key].
+
+	Other top-level values are skipped (arrays item by item). Yields nothing
+	if the file does not exist yet; a file that can't be read or decoded
+	raises (OSError / ValueError) instead of looking like an empty history.
+
+	The file stays locked until the generator is exhausted or closed, so the
+	apps' saves wait while a report section is being written; consume it
+	promptly.
+	"""
+	if not os.path.exists(path):
+		return
+	with file_lock(path), open(path, "r", encoding="utf-8") as f:
+		stream = _JSONStream(f)
+		if key is None:
+			if stream.peek() == "[":
+				yield from stream.items()
+			return
+		stream.take("{")
+		if stream.peek() == "}":
+			return
+		while True:
+			name = stream.value()
+			stream.take(":")
+			if name == key:
+				if stream.peek() == "[":
+					yield from stream.items()
+				return
+			if stream.peek() == "[":
+				for _item in stream.items():
+					pass
+			else:
+				stream.value()
+			sep = stream.peek()
+			stream.pos += 1
+			if sep != ",":
+				return
+
+
+def _in_range(day, start, end):
+	return day is not None and (start is None or day >= start) and (end is None or day <= end)
+
+
+def _med_doses(log_file, end):
+	"""(day, entry, med) for every named medication up to `end`, in log order.
+
+	The logger appends entries as they are saved, so log order is mostly
+	chronological. Back-dated entries can still appear, and the per-medication
+	sections below never let one move a medication's state backwards in time.
+	"""
+	for entry in iter_json_array(log_file):
+		when = parse_when(entry.get("date"), entry.get("time"), entry.get("timestamp"))
+		if when is None or (end is not None and when.date() > end):
+			continue
+		for med in (entry.get("medications") or []):
+			if (med.get("name") or "").strip():
+				yield when.date(), entry, med
+
+
+def _describe(med):
+	dose = " ".join(p for p in ((med.get("dose") or "").strip(), (med.get("unit") or "").strip()) if p)
+	return ", ".join(p for p in (dose, (med.get("route") or "").strip()) if p) or "(no dose)"
+
+
+def current_regimen(log_file, start, end, recent_days=14):
+	"""Latest dose of each medication still being logged by `end` (default today).
+
+	A medication counts as current if it was logged within recent_days, or
+	within twice its last interval for ones taken less often (e.g. weekly
+	injections), before `end`; stopped or replaced ones drop out.
+	"""
+	last = {}  # name -> (day, med, interval between its last two logged days)
+	for day, _entry, med in _med_doses(log_file, end):
+		key = med["name"].strip().lower()
+		if not _in_range(day, start, end):
+			continue
+		previous = last.get(key)
+		if previous is None:
+			last[key] = (day, med, None)
+		elif day > previous[0]:
+			last[key] = (day, med, (day - previous[0]).days)
+		elif day == previous[0]:
+			last[key] = (day, med, previous[2])
+	today = end or date.today()
+	current = [(day, med) for day, med, interval in last.values()
+		if (today - day).days <= max(recent_days, 2 * (interval or 0))]
+	for day, med in sorted(current, key=lambda dm: dm[1]["name"].lower()):
+		yield ("li", f"{med['name'].strip()}: {_describe(med)} (last logged {day:%Y-%m-%d})")
+
+
+def dose_changes(log_file, start, end):
+	last = {}  # name -> (day, dose) of the latest dose seen so far
+	for day, _entry, med in _med_doses(log_file, end):
+		key = med["name"].strip().lower()
+		dose = _describe(med)
+		last_day, previous = last.get(key, (None, None))
+		if last_day is not None and day < last_day:
+			continue  # back-dated: older than what we already know
+		last[key] = (day, dose)
+		if previous != dose and _in_range(day, start, end):
+			before = previous or "started"
+			yield ("li", f"{day:%Y-%m-%d}  {med['name'].strip()}: {before} -> {dose}")
+
+
+def adherence_gaps(log_file, start, end, gap_days=3):
+	"""Gaps longer than gap_days and more than twice that medication's previous interval."""
+	last_day = {}
+	last_interval = {}
+	for day, _entry, med in _med_doses(log_file, end):
+		key = med["name"].strip().lower()
+		previous = last_day.get(key)
+		if previous is None:
+			last_day[key] = day
+			continue
+		if day <= previous:
+			continue  # same day or back-dated: the latest day seen stays the baseline
+		last_day[key] = day
+		interval = (day - previous).days
+		usual = last_interval.get(key)
+		last_interval[key] = interval
+		if interval > gap_days and (usual is None or interval > 2 * usual) and _in_range(day, start, end):
+			yield ("li", f"{med['name'].strip()}: nothing logged {previous:%Y-%m-%d} -> {day:%Y-%m-%d} ({interval} days)")
+
+
+def logged_notes(log_file, start, end):
+	for entry in iter_json_array(log_file):
+		notes = (entry.get("notes") or "").strip()
+		when = parse_when(entry.get("date"), entry.get("time"), entry.get("timestamp"))
+		if notes and when is not None and _in_range(when.date(), start, end):
+			yield ("li", f"{when:%Y-%m-%d}  {notes}")
+
+
+def mood_trends(journal_file, start, end):
+	# one running total per month, so memory grows with months, not records;
+	# [snapshots, [[sum, count] per metric], tag counts]
+	def new_month():
+		return [0, [[0.0, 0] for _m in METRICS], {}]
+
+	months = {}
+	for snap in iter_json_array(journal_file, "mood_snapshots"):
+		when = parse_when("", "", snap.get("timestamp"))
+		if when is None or not _in_range(when.date(), start, end):
+			continue
+		month = months.setdefault(f"{when:%Y-%m}", new_month())
+		month[0] += 1
+		for total, metric in zip(month[1], METRICS):
+			value = metric_value(snap, metric)
+			if value is not None:
+				total[0] += value
+				total[1] += 1
+	for entry in iter_json_array(journal_file, "entries"):
+		when = parse_when(entry.get("date"), "", entry.get("timestamp"))
+		if when is None or not _in_range(when.date(), start, end):
+			continue
+		tags = months.setdefault(f"{when:%Y-%m}", new_month())[2]
+		for tag in (entry.get("tags") or []):
+			tag = tag.strip().lower()
+			tags[tag] = tags.get(tag, 0) + 1
+	for key in sorted(months):
+		count, totals, tags = months[key]
+		parts = []
+		if count:
+			averages = ", ".join(f"{m} {total / n:.1f}" for m, (total, n) in zip(METRICS, totals) if n)
+			parts.append(f"{averages} ({count} snapshots)" if averages else f"{count} snapshots")
+		if tags:
+			top = sorted(tags.items(), key=lambda kv: (-kv[1], kv[0]))[:5]
+			parts.append("tags: " + ", ".join(f"{t} x{n}" for t, n in top))
+		yield ("li", f"{key}  " + "; ".join(parts))
+
+
+def report_events(start=None, end=None, log_file=LOG_FILE, journal_file=JOURNAL_FILE, gap_days=3):
+	"""Yield ("title"|"h"|"p"|"li", text) events; each section is its own streaming pass."""
+	span = f"{start or 'start'} to {end or 'today'}"
+	yield ("title", "HRT summary")
+	yield ("p", f"Period: {span}. Generated {datetime.now():%Y-%m-%d %H:%M}.")
+	sections = (
+		("Current regimen", current_regimen(log_file, start, end)),
+		("Dose changes", dose_changes(log_file, start, end)),
+		("Possible adherence gaps", adherence_gaps(log_file, start, end, gap_days)),
+		("Notes from the medication log", logged_notes(log_file, start, end)),
+		("Mood trends (monthly averages, 0-10)", mood_trends(journal_file, start, end)),
+	)
+	for heading, events in sections:
+		yield ("h", heading)
+		empty = True
+		for event in events:
+			empty = False
+			yield event
+		if empty:
+			yield ("p", "Nothing recorded.")
+
+
+def render_text(events):
+	for kind, text in events:
+		if kind == "title":
+			yield f"{text}\n{'=' * len(text)}\n"
+		elif kind == "h":
+			yield f"\n{text}\n{'-' * len(text)}\n"
+		elif kind == "li":
+			yield f"  - {text}\n"
+		else:
+			yield f"{text}\n"
+
+
+def render_html(events):
+	yield ("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>HRT summary</title>\n"
+		"<style>body{font-family:sans-serif;max-width:50em;margin:2em auto;line-height:1.4}"
+		"h2{border-bottom:1px solid #999}@media print{body{margin:0}}</style>\n</head><body>\n")
+	in_list = False
+	for kind, text in events:
+		if in_list and kind != "li":
+			yield "</ul>\n"
+			in_list = False
+		text = html.escape(text)
+		if kind == "title":
+			yield f"<h1>{text}</h1>\n"
+		elif kind == "h":
+			yield f"<h2>{text}</h2>\n"
+		elif kind == "li":
+			if not in_list:
+				yield "<ul>\n"
+				in_list = True
+			yield f"<li>{text}</li>\n"
+		else:
+			yield f"<p>{text}</p>\n"
+	if in_list:
+		yield "</ul>\n"
+	yield "</body></html>\n"
+
+
+def write_report(out, start=None, end=None, fmt="text", **kwargs):
+	"""Write the report to the file object `out` chunk by chunk."""
+	render = render_html if fmt == "html" else render_text
+	for chunk in render(report_events(start, end, **kwargs)):
+		out.write(chunk)
+
+
+def _date_arg(value):
+	try:
+		return date.fromisoformat(value)
+	except ValueError:
+		raise argparse.ArgumentTypeError("dates must be YYYY-MM-DD")
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Write a printable HRT summary for a date range.")
+	parser.add_argument("--from", dest="start", type=_date_arg, help="first day (YYYY-MM-DD), default: all history")
+	parser.add_argument("--to", dest="end", type=_date_arg, help="last day (YYYY-MM-DD), default: today")
+	parser.add_argument("--format", choices=("text", "html"), default="text")
+	parser.add_argument("-o", "--output", help="output file (default: print)")
+	parser.add_argument("--log", default=LOG_FILE, help="medication log JSON")
+	parser.add_argument("--journal", default=JOURNAL_FILE, help="journal data JSON")
+	args = parser.parse_args(argv)
+	kwargs = {"log_file": args.log, "journal_file": args.journal}
+	try:
+		if args.output:
+			with open(args.output, "w", encoding="utf-8") as out:
+				write_report(out, args.start, args.end, args.format, **kwargs)
+		else:
+			write_report(sys.stdout, args.start, args.end, args.format, **kwargs)
+	except (OSError, ValueError) as e:
+		sys.exit(f"report: {e}")
+
+
+if __name__ == "__main__":
+	main()
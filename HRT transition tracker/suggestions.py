@@ -0,0 +1,130 @@
+"""History-ranked suggestions for the medication row dropdowns.
+
+MedicationHistory is fed every saved entry once (at startup, then one entry
+per save) and answers per-keystroke prefix lookups without touching the log.
+"""
+import math
+
+# suggestions kept per prefix
+TOP_K = 10
+# a use this many uses ago counts half as much as one made now
+HALF_LIFE = 50
+# regimens offered by "Repeat last"
+TEMPLATE_COUNT = 5
+
+
+class _Node:
+	__slots__ = ("children", "top")
+
+	def __init__(self):
+		self.children = {}
+		self.top = []  # best keys under this prefix, highest score first
+
+
+class RankedTrie:
+	"""Prefix index of terms ranked by frequency and recency.
+
+	Use number n adds 2 ** (n / HALF_LIFE) to the term's score (kept as log2 so
+	it never overflows). Weights only grow, which orders terms the same as
+	decaying all older scores would, but only the used term's score changes.
+	So each node can cache its TOP_K keys and an add only re-ranks the nodes
+	on that term's path; lookup is O(len(prefix)) whatever the history size.
+	"""
+
+	def __init__(self):
+		self._root = _Node()
+		self._scores = {}  # casefolded term -> (log2 score, latest spelling)
+		self._uses = 0
+
+	def add(self, term):
+		term = (term or "").strip()
+		if not term:
+			return
+		key = term.casefold()
+		weight = self._uses / HALF_LIFE
+		self._uses += 1
+		old = self._scores.get(key)
+		if old is None:
+			score = weight
+		else:
+			hi, lo = max(old[0], weight), min(old[0], weight)
+			score = hi + math.log2(1 + 2 ** (lo - hi))
+		self._scores[key] = (score, term)
+
+		node = self._root
+		self._rerank(node, key)
+		for ch in key:
+			node = node.children.setdefault(ch, _Node())
+			self._rerank(node, key)
+
+	def _rerank(self, node, key):
+		# only `key` moved (upwards), so the other cached entries keep their order
+		top = [k for k in node.top if k != key]
+		top.append(key)
+		top.sort(key=lambda k: self._scores[k][0], reverse=True)
+		node.top = top[:TOP_K]
+
+	def lookup(self, prefix):
+		node = self._root
+		for ch in (prefix or "").strip().casefold():
+			node = node.children.get(ch)
+			if node is None:
+				return []
+		return [self._scores[k][1] for k in node.top]
+
+
+class MedicationHistory:
+	"""Ranked name/dose/unit/route suggestions and the last few distinct regimens."""
+
+	FIELDS = ("name", "dose", "unit", "route")
+
+	def __init__(self, entries=()):
+		self.tries = {field: RankedTrie() for field in self.FIELDS}
+		self.regimens = []  # (label, meds, match key), newest first
+		for entry in entries:
+			self.add_entry(entry)
+
+	def add_entry(self, entry):
+		meds = []
+		for med in (entry.get("medications") or []):
+			for field in self.FIELDS:
+				self.tries[field].add(med.get(field))
+			if (med.get("name") or "").strip():
+				meds.append({field: (med.get(field) or "").strip() for field in self.FIELDS})
+		if not meds:
+			return
+
+		key = [tuple(m[f].casefold() for f in self.FIELDS) for m in meds]
+		self.regimens = [r for r in self.regimens if r[2] != key]
+		parts = [" ".join(p for p in (m["name"], m["dose"] + m["unit"], m["route"]) if p) for m in meds]
+		when = (entry.get("date") or entry.get("timestamp") or "").strip()
+		label = f"{when}: {', '.join(parts)}" if when else ", ".join(parts)
+		self.regimens.insert(0, (label, meds, key))
+		del self.regimens[TEMPLATE_COUNT:]
+
+	def suggest(self, field, prefix, defaults=()):
+		"""History matches first, then the built-in options that match and aren't already listed."""
+		hits = self.tries[field].lookup(prefix)
+		folded = (prefix or "").strip().casefold()
+		seen = {h.casefold() for h in hits}
+		return hits + [d for d in defaults if d.casefold().startswith(folded) and d.casefold() not in seen]
+
+	def suggest_for_text(self, field, text, defaults=()):
+		"""Like suggest(), but a complete value (e.g. just picked) shows the full list again."""
+		hits = self.suggest(field, text, defaults)
+		folded = (text or "").strip().casefold()
+		if folded and any(h.casefold() == folded for h in hits):
+			return self.suggest(field, "", defaults)
+		return hits
+
+	def templates(self):
+		"""(label, meds) newest first; labels are unique so they can key a menu."""
+		result = []
+		seen = set()
+		for label, meds, _key in self.regimens:
+			unique, n = label, 2
+			while unique in seen:
+				unique, n = f"{label} ({n})", n + 1
+			seen.add(unique)
+			result.append((unique, meds))
+		return result
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from insights import Insights, parse_when
+
+
+def test_parse_when_date_and_time():
+	assert parse_when("2024-01-05", "21:30") == datetime(2024, 1, 5, 21, 30)
+
+
+def test_parse_when_single_digit_hour():
+	# _save_entry validates with strptime("%H:%M"), which accepts "9:30"
+	assert parse_when("2024-01-05", "9:30") == datetime(2024, 1, 5, 9, 30)
+
+
+def test_parse_when_unpadded_date_and_minutes():
+	assert parse_when("2024-1-5", "9:30", "2024-03-01T10:00:00") == datetime(2024, 1, 5, 9, 30)
+	assert parse_when("2024-01-05", "9:5") == datetime(2024, 1, 5, 9, 5)
+	assert parse_when("2024-1-5", "", "2024-03-01T10:00:00") == datetime(2024, 1, 5)
+
+
+def test_parse_when_falls_back():
+	assert parse_when("2024-01-05", "later") == datetime(2024, 1, 5)
+	assert parse_when("", "", "2024-01-05T08:15:00") == datetime(2024, 1, 5, 8, 15)
+	assert parse_when("not a date", "", "") is None
+
+
+def test_change_windows_average_mood_before_and_after():
+	log = [
+		{"date": "2024-01-01", "time": "9:00", "medications": [{"name": "Estradiol", "dose": "2", "unit": "mg", "route": "oral"}]},
+		{"date": "2024-01-10", "time": "9:00", "medications": [{"name": "Estradiol", "dose": "4", "unit": "mg", "route": "oral"}]},
+	]
+	journal = {
+		"mood_snapshots": [
+			{"timestamp": "2024-01-08T20:00:00", "mood": 3, "dysphoria": 8, "euphoria": 2},
+			{"timestamp": "2024-01-10T08:00:00", "mood": 3, "dysphoria": 6, "euphoria": 2},
+			{"timestamp": "2024-01-12T20:00:00", "mood": 7, "dysphoria": 3, "euphoria": 6},
+		],
+		"entries": [{"timestamp": "2024-01-11T10:00:00", "date": "2024-01-11", "tags": ["Euphoria"], "text": ""}],
+	}
+	windows = Insights(log, journal).change_windows(days=7)
+	change = windows[-1]
+	assert change["before"] == ("2", "mg", "oral")
+	assert change["after"] == ("4", "mg", "oral")
+	# the 08:00 snapshot is before the 09:00 dose on the same day
+	assert change["averages"]["dysphoria"] == (7.0, 3.0)
+	assert change["tags"]["euphoria"] == (0, 1)
+
+
+def test_missing_metric_is_skipped_not_counted_as_zero():
+	log = [{"date": "2024-01-10", "time": "9:00", "medications": [{"name": "Spironolactone", "dose": "50", "unit": "mg"}]}]
+	journal = {"mood_snapshots": [
+		{"timestamp": "2024-01-09T20:00:00", "mood": 6},
+		{"timestamp": "2024-01-09T21:00:00", "mood": 4, "dysphoria": 5, "euphoria": ""},
+		{"timestamp": "2024-01-11T20:00:00", "mood": 8, "dysphoria": 0},
+	]}
+	averages = Insights(log, journal).change_windows(days=7)[0]["averages"]
+	assert averages["mood"] == (5.0, 8.0)
+	assert averages["dysphoria"] == (5.0, 0.0)
+	assert averages["euphoria"] == (None, None)
@@ -0,0 +1,39 @@
+from medtracker import DataManager
+
+
+def _entry(note):
+	return {"date": "2024-01-05", "time": "08:00", "notes": note, "medications": [], "timestamp": "2024-01-05T08:00:00"}
+
+
+def test_interleaved_appends_keep_every_entry(tmp_path):
+	path = str(tmp_path / "log.json")
+	a = DataManager(path)
+	b = DataManager(path)
+	a.load_hrt_entries()
+	b.load_hrt_entries()
+
+	first, foreign = a.append_hrt_entry(_entry("a1"))
+	assert foreign == []
+	second, foreign = b.append_hrt_entry(_entry("b1"))
+	assert foreign == [first]
+	third, foreign = a.append_hrt_entry(_entry("a2"))
+	assert foreign == [second]
+
+	notes = [e["notes"] for e in DataManager(path).load_hrt_entries()]
+	assert notes == ["a1", "b1", "a2"]
+	assert len({first["id"], second["id"], third["id"]}) == 3
+
+
+def test_poll_changes_reports_only_other_instances_entries(tmp_path):
+	path = str(tmp_path / "log.json")
+	a = DataManager(path)
+	b = DataManager(path)
+	a.load_hrt_entries()
+	b.load_hrt_entries()
+
+	a.append_hrt_entry(_entry("mine"))
+	assert a.poll_changes() is None
+
+	theirs, _foreign = b.append_hrt_entry(_entry("theirs"))
+	assert a.poll_changes() == [theirs]
+	assert a.poll_changes() is None
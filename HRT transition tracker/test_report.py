@@ -0,0 +1,88 @@
+import io
+import json
+from datetime import date
+
+import pytest
+
+import report
+
+
+def _write_log(tmp_path, doses):
+	entries = [
+		{"id": str(i), "date": day, "time": "08:00", "notes": "", "timestamp": f"{day}T08:00:00",
+			"medications": [{"name": "Estradiol", "dose": dose, "unit": "mg", "route": "oral", "time": ""}]}
+		for i, (day, dose) in enumerate(doses)
+	]
+	path = tmp_path / "log.json"
+	path.write_text(json.dumps(entries, indent=2), encoding="utf-8")
+	return str(path)
+
+
+def _texts(events):
+	return [text for _kind, text in events]
+
+
+def test_back_dated_entry_does_not_create_adherence_gap(tmp_path):
+	log = _write_log(tmp_path, [("2024-01-10", "2"), ("2024-01-01", "2"), ("2024-01-11", "2")])
+	assert _texts(report.adherence_gaps(log, None, None)) == []
+
+
+def test_adherence_gap_reported(tmp_path):
+	log = _write_log(tmp_path, [("2024-01-01", "2"), ("2024-01-02", "2"), ("2024-01-10", "2")])
+	assert _texts(report.adherence_gaps(log, None, None)) == [
+		"Estradiol: nothing logged 2024-01-02 -> 2024-01-10 (8 days)"
+	]
+
+
+def test_back_dated_entry_does_not_change_current_regimen(tmp_path):
+	log = _write_log(tmp_path, [("2024-02-01", "4"), ("2024-01-01", "2")])
+	assert _texts(report.current_regimen(log, None, date(2024, 2, 10))) == [
+		"Estradiol: 4 mg, oral (last logged 2024-02-01)"
+	]
+	assert _texts(report.dose_changes(log, None, None)) == ["2024-02-01  Estradiol: started -> 4 mg, oral"]
+
+
+def test_stream_reads_journal_section_across_chunks(tmp_path, monkeypatch):
+	data = {"identity": {"name": "x"}, "mood_snapshots": [{"mood": 4.5e0}], "entries": [{"text": "a"}, 12345, {"text": "b"}]}
+	path = tmp_path / "journal.json"
+	path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+	monkeypatch.setattr(report, "CHUNK_SIZE", 3)
+	assert list(report.iter_json_array(str(path), "entries")) == data["entries"]
+
+
+def test_damaged_log_raises_instead_of_reporting_nothing(tmp_path):
+	log = tmp_path / "log.json"
+	log.write_text('[{"date": "2024-01-01", "medications": [', encoding="utf-8")
+	with pytest.raises(ValueError):
+		report.write_report(io.StringIO(), log_file=str(log), journal_file=str(tmp_path / "missing.json"))
+
+
+def test_missing_files_report_nothing_recorded(tmp_path):
+	out = io.StringIO()
+	report.write_report(out, log_file=str(tmp_path / "log.json"), journal_file=str(tmp_path / "journal.json"))
+	assert out.getvalue().count("Nothing recorded.") == 5
+
+
+def test_current_regimen_drops_medications_no_longer_logged(tmp_path):
+	entries = [
+		{"date": "2024-01-01", "medications": [{"name": "Spironolactone", "dose": "100", "unit": "mg"}]},
+		{"date": "2024-01-01", "medications": [{"name": "Estradiol valerate", "dose": "5", "unit": "mg", "route": "IM"}]},
+		{"date": "2024-01-22", "medications": [{"name": "Estradiol valerate", "dose": "5", "unit": "mg", "route": "IM"}]},
+		{"date": "2024-02-20", "medications": [{"name": "Bicalutamide", "dose": "50", "unit": "mg"}]},
+	]
+	log = tmp_path / "log.json"
+	log.write_text(json.dumps(entries), encoding="utf-8")
+	# spironolactone was replaced; the every-three-weeks injection is still due
+	assert _texts(report.current_regimen(str(log), None, date(2024, 3, 1))) == [
+		"Bicalutamide: 50 mg (last logged 2024-02-20)",
+		"Estradiol valerate: 5 mg, IM (last logged 2024-01-22)",
+	]
+
+
+def test_mood_trends_skip_metrics_a_snapshot_does_not_record(tmp_path):
+	journal = tmp_path / "journal.json"
+	journal.write_text(json.dumps({"mood_snapshots": [
+		{"timestamp": "2024-01-05T20:00:00", "mood": 6, "dysphoria": 2},
+		{"timestamp": "2024-01-06T20:00:00", "mood": 8, "dysphoria": ""},
+	]}), encoding="utf-8")
+	assert _texts(report.mood_trends(str(journal), None, None)) == ["2024-01  mood 7.0, dysphoria 2.0 (2 snapshots)"]
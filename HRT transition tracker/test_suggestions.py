@@ -0,0 +1,68 @@
+from suggestions import TEMPLATE_COUNT, TOP_K, MedicationHistory, RankedTrie
+
+
+def _entry(date, *meds):
+	return {"date": date, "medications": [
+		{"name": name, "dose": dose, "unit": "mg", "route": route} for name, dose, route in meds
+	]}
+
+
+def test_lookup_is_case_insensitive_prefix_match():
+	trie = RankedTrie()
+	trie.add("Estradiol")
+	trie.add("Spironolactone")
+	assert trie.lookup("es") == ["Estradiol"]
+	assert trie.lookup("ESTRA") == ["Estradiol"]
+	assert trie.lookup("x") == []
+
+
+def test_recent_uses_outrank_older_ones_at_equal_frequency():
+	trie = RankedTrie()
+	for term in ["Estradiol", "Estradiol", "Esomeprazole", "Esomeprazole"]:
+		trie.add(term)
+	assert trie.lookup("es") == ["Esomeprazole", "Estradiol"]
+
+
+def test_term_moving_up_enters_cached_top_k():
+	trie = RankedTrie()
+	for i in range(TOP_K + 5):
+		trie.add(f"Med{i:02d}")
+	assert "Med00" not in trie.lookup("med")
+	for _ in range(3):
+		trie.add("Med00")
+	top = trie.lookup("med")
+	assert top[0] == "Med00"
+	assert len(top) == TOP_K
+	# the nodes along the path were re-ranked too, not just the root
+	assert trie.lookup("med0")[0] == "Med00"
+
+
+def test_suggest_for_text_shows_full_list_for_complete_value():
+	history = MedicationHistory([_entry("2024-01-01", ("Estradiol", "2", "oral"))])
+	defaults = ["Spironolactone", "Estradiol (gel)"]
+	assert history.suggest_for_text("name", "e", defaults) == ["Estradiol", "Estradiol (gel)"]
+	assert history.suggest_for_text("name", "estradiol", defaults) == ["Estradiol", "Spironolactone", "Estradiol (gel)"]
+
+
+def test_templates_deduplicate_regimens_newest_first():
+	history = MedicationHistory([
+		_entry("2024-01-01", ("Estradiol", "2", "oral")),
+		_entry("2024-01-02", ("Estradiol", "4", "oral")),
+		_entry("2024-01-03", ("estradiol", "2", "Oral")),
+	])
+	labels = [label for label, _meds in history.templates()]
+	assert labels == ["2024-01-03: estradiol 2mg Oral", "2024-01-02: Estradiol 4mg oral"]
+
+
+def test_templates_keep_only_the_last_few():
+	history = MedicationHistory([_entry(f"2024-01-{d:02d}", ("Estradiol", str(d), "oral")) for d in range(1, 10)])
+	assert len(history.templates()) == TEMPLATE_COUNT
+
+
+def test_template_labels_are_unique():
+	history = MedicationHistory([
+		_entry("2024-01-01", ("A", "2", "")),
+		{"date": "2024-01-01", "medications": [{"name": "A", "dose": "2m", "unit": "g", "route": ""}]},
+	])
+	labels = [label for label, _meds in history.templates()]
+	assert labels == ["2024-01-01: A 2mg", "2024-01-01: A 2mg (2)"]
@@ -1,19 +1,66 @@
 import customtkinter as ctk
+import contextlib
 import json
 from datetime import datetime
 import os
+import queue
+import sys
+import threading
 from tkinter import messagebox
 import tkinter as tk
 
 # Store journal data under: <this folder>\entrys\hrt_journal_data.json
 _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The file locking protocol lives with the medication logger, which shares it.
+# Appended (not inserted) so the tracker's modules never shadow anything else.
+sys.path.append(os.path.normpath(os.path.join(_BASE_DIR, os.pardir, "HRT transition tracker")))
+try:
+    from locking import file_lock, file_version
+except ImportError:
+    # Journal shipped without the tracker folder: run without cross-instance locking
+    @contextlib.contextmanager
+    def file_lock(path):
+        yield
+
+    def file_version(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
 _ENTRYS_DIR = os.path.join(_BASE_DIR, "entrys")
 os.makedirs(_ENTRYS_DIR, exist_ok=True)
 
 DATA_FILE = os.path.join(_ENTRYS_DIR, "hrt_journal_data.json")
 
+# Unsaved text from the Today and Mood tabs, restored on next launch
+DRAFT_FILE = os.path.join(_ENTRYS_DIR, "hrt_journal_draft.json")
+
+# How often the app checks the data file for changes saved by another window
+WATCH_INTERVAL_MS = 1000
+
+# Quiet time after the last keystroke before the draft is written
+DRAFT_DELAY_MS = 1500
 
-def load_data():
+_draft_lock = threading.Lock()
+
+
+def with_defaults(data):
+    data.setdefault("entries", [])
+    data.setdefault("mood_snapshots", [])
+    data.setdefault("identity", {
+        "name": "",
+        "pronouns": "",
+        "labels": "",
+        "affirmations": ""
+    })
+    data.setdefault("resources", "")
+    return data
+
+
+def _read_data():
     if os.path.exists(DATA_FILE):
         try:
             with open(DATA_FILE, "r", encoding="utf-8") as f:
@@ -23,12 +70,72 @@ def load_data():
     return {}
 
 
-def save_data(data):
+def _write_data(data):
+    tmp = DATA_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, DATA_FILE)
+
+
+def load_data_versioned():
+    """Return (data, version) read together under the lock."""
+    with file_lock(DATA_FILE):
+        return with_defaults(_read_data()), file_version(DATA_FILE)
+
+
+def update_data(data, version, mutate):
+    """Apply mutate(data) and save, without clobbering another instance's writes.
+
+    data is the caller's in-memory copy, loaded at file version `version`.
+    If the file still has that version it is written as-is; otherwise the
+    file is re-read under the lock and mutate is replayed on the fresh copy.
+    Returns (data, version, reloaded). Write errors are raised to the caller.
+    """
+    with file_lock(DATA_FILE):
+        reloaded = file_version(DATA_FILE) != version
+        if reloaded:
+            data = with_defaults(_read_data())
+        mutate(data)
+        _write_data(data)
+        return data, file_version(DATA_FILE), reloaded
+
+
+def load_draft():
     try:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print("Error saving data:", e)
+        with open(DRAFT_FILE, "r", encoding="utf-8") as f:
+            draft = json.load(f)
+            if isinstance(draft, dict):
+                return draft
+    except Exception:
+        pass
+    return {}
+
+
+def save_draft(draft):
+    """Write the draft to its own small file (removed when empty).
+
+    Kept separate from DATA_FILE so autosaving never rewrites the journal.
+    """
+    with _draft_lock:
+        try:
+            if not any((v or "").strip() for v in draft.values()):
+                if os.path.exists(DRAFT_FILE):
+                    os.remove(DRAFT_FILE)
+                return
+            tmp = DRAFT_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(draft, f, ensure_ascii=False)
+            os.replace(tmp, DRAFT_FILE)
+        except Exception as e:
+            print("Error saving draft:", e)
+
+
+def _entry_key(e):
+    return (e.get("timestamp"), e.get("date"), e.get("text"), tuple(e.get("tags") or []))
+
+
+def _entry_sort_key(e):
+    return e.get("timestamp") or e.get("date") or ""
 
 
 class HRTJournalApp(ctk.CTk):
@@ -42,16 +149,7 @@ class HRTJournalApp(ctk.CTk):
         ctk.set_default_color_theme("blue")
 
         # Load data
-        self.data = load_data()
-        self.data.setdefault("entries", [])
-        self.data.setdefault("mood_snapshots", [])
-        self.data.setdefault("identity", {
-            "name": "",
-            "pronouns": "",
-            "labels": "",
-            "affirmations": ""
-        })
-        self.data.setdefault("resources", "")
+        self.data, self._data_version = load_data_versioned()
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -59,6 +157,60 @@ class HRTJournalApp(ctk.CTk):
         self.build_ui()
 
         self._entries_window = None  # Track entries viewer window
+        self.after(WATCH_INTERVAL_MS, self._watch_data)
+
+        # Draft autosave: keystrokes are debounced on the UI thread, the file
+        # write happens on a background thread
+        self._draft_after = None
+        self._draft_queue = queue.Queue()
+        self._draft_seq = 0  # last draft handed out for writing
+        self._draft_written = 0  # last draft actually written
+        self._draft_write_lock = threading.Lock()
+        self._committed = {}  # field -> text already saved to the journal
+        self._hidden_text = ""  # Today text put away by Quick hide
+        threading.Thread(target=self._draft_writer, daemon=True).start()
+        self._restore_draft()
+        for widget in (self.today_text, self.tags_entry, self.body_text):
+            widget.bind("<KeyRelease>", self._schedule_draft_save, add="+")
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    # ---------- SHARED FILE ----------
+    def _commit(self, mutate):
+        """Apply mutate to self.data and save it under the file lock.
+
+        Returns False (after telling the user) if the file could not be written.
+        """
+        try:
+            self.data, self._data_version, reloaded = update_data(self.data, self._data_version, mutate)
+        except Exception as e:
+            messagebox.showerror("Save failed", f"Could not save the journal:\n{e}")
+            # drop the half-applied change so memory matches what is on disk
+            self.data, self._data_version = load_data_versioned()
+            self._refresh_entries_list()
+            return False
+        if reloaded:
+            # another instance saved first; the viewer may be missing its changes
+            self._refresh_entries_list()
+        return True
+
+    def _watch_data(self):
+        # change feed: poll the file version and apply only what the other instance added
+        try:
+            if file_version(DATA_FILE) != self._data_version:
+                self._apply_external_changes()
+        finally:
+            self.after(WATCH_INTERVAL_MS, self._watch_data)
+
+    def _apply_external_changes(self):
+        old_keys = {_entry_key(e) for e in self.data["entries"]}
+        self.data, self._data_version = load_data_versioned()
+        new_keys = {_entry_key(e) for e in self.data["entries"]}
+        if old_keys - new_keys:
+            # something was deleted elsewhere; positions shifted, rebuild
+            self._refresh_entries_list()
+            return
+        added = [e for e in self.data["entries"] if _entry_key(e) not in old_keys]
+        self._insert_viewer_entries(added)
 
     def build_ui(self):
         self.tabview = ctk.CTkTabview(self)
@@ -76,6 +228,68 @@ class HRTJournalApp(ctk.CTk):
         self.build_resources_tab()
         self.build_settings_tab()
 
+    # ---------- DRAFTS ----------
+    def _current_draft(self):
+        texts = {
+            "today_text": self.today_text.get("1.0", "end-1c"),
+            "tags": self.tags_entry.get(),
+            "body_text": self.body_text.get("1.0", "end-1c"),
+        }
+        # Text that was just saved stays on screen but is not a draft any more,
+        # until it is edited
+        draft = {field: ("" if text == self._committed.get(field) else text) for field, text in texts.items()}
+        draft["hidden_today_text"] = self._hidden_text
+        return draft
+
+    def _restore_draft(self):
+        draft = load_draft()
+        today = "\n\n".join(t for t in (draft.get("hidden_today_text"), draft.get("today_text")) if (t or "").strip())
+        if today:
+            self.today_text.insert("1.0", today)
+        if draft.get("tags"):
+            self.tags_entry.insert(0, draft["tags"])
+        if draft.get("body_text"):
+            self.body_text.insert("1.0", draft["body_text"])
+
+    def _schedule_draft_save(self, _evt=None):
+        if self._draft_after is not None:
+            self.after_cancel(self._draft_after)
+        self._draft_after = self.after(DRAFT_DELAY_MS, self._flush_draft)
+
+    def _flush_draft(self):
+        """Queue the current draft for the background writer."""
+        if self._draft_after is not None:
+            self.after_cancel(self._draft_after)
+            self._draft_after = None
+        self._draft_seq += 1
+        self._draft_queue.put((self._draft_seq, self._current_draft()))
+
+    def _write_draft(self, seq, draft):
+        # Never let an older draft overwrite a newer one
+        with self._draft_write_lock:
+            if seq <= self._draft_written:
+                return
+            self._draft_written = seq
+            save_draft(draft)
+
+    def _draft_writer(self):
+        while True:
+            seq, draft = self._draft_queue.get()
+            # Only the newest draft matters
+            while not self._draft_queue.empty():
+                seq, draft = self._draft_queue.get_nowait()
+            self._write_draft(seq, draft)
+
+    def _on_close(self):
+        # Write the final state here rather than trusting the daemon thread to
+        # finish whatever is still queued before the process exits
+        if self._draft_after is not None:
+            self.after_cancel(self._draft_after)
+            self._draft_after = None
+        self._draft_seq += 1
+        self._write_draft(self._draft_seq, self._current_draft())
+        self.destroy()
+
     # ---------- TODAY TAB ----------
     def build_today_tab(self):
         self.tab_today.grid_rowconfigure(1, weight=1)
@@ -136,18 +350,30 @@ class HRTJournalApp(ctk.CTk):
             "tags": tags,
             "text": text
         }
-        self.data["entries"].append(entry)
-        save_data(self.data)
+        if not self._commit(lambda data: data["entries"].append(entry)):
+            return
+        self._committed["today_text"] = self.today_text.get("1.0", "end-1c")
+        self._committed["tags"] = self.tags_entry.get()
+        self._flush_draft()
 
         self.title("Trans Journal  –  Saved")
 
     def clear_today_text(self):
         self.today_text.delete("1.0", "end")
+        self._flush_draft()
 
     # ---------- ENTRIES VIEWER ----------
     def _entries_sorted(self):
         entries = list(self.data.get("entries", []) or [])
-        return sorted(entries, key=lambda e: (e.get("timestamp") or e.get("date") or ""), reverse=True)
+        return sorted(entries, key=_entry_sort_key, reverse=True)
+
+    @staticmethod
+    def _entry_label(e):
+        ts = (e.get("timestamp") or "").strip()
+        date = (e.get("date") or "").strip()
+        tags = e.get("tags") or []
+        tag_str = f" [{', '.join(tags)}]" if tags else ""
+        return (ts or date or "(no date)") + tag_str
 
     def open_entries_viewer(self):
         entries = self._entries_sorted()
@@ -226,12 +452,7 @@ class HRTJournalApp(ctk.CTk):
 
         self._entries_listbox.delete(0, "end")
         for e in entries:
-            ts = (e.get("timestamp") or "").strip()
-            date = (e.get("date") or "").strip()
-            tags = e.get("tags") or []
-            tag_str = f" [{', '.join(tags)}]" if tags else ""
-            label = (ts or date or "(no date)") + tag_str
-            self._entries_listbox.insert("end", label)
+            self._entries_listbox.insert("end", self._entry_label(e))
 
         # auto-select first
         if entries:
@@ -240,6 +461,23 @@ class HRTJournalApp(ctk.CTk):
             self._entries_listbox.activate(0)
             self._update_entry_preview_from_selection()
 
+    def _insert_viewer_entries(self, added):
+        """Insert new entries into the open viewer at their sorted position."""
+        if not added:
+            return
+        if not (self._entries_window is not None and self._entries_window.winfo_exists()):
+            return
+        if not hasattr(self, "_viewer_entries"):
+            return
+        for e in sorted(added, key=_entry_sort_key, reverse=True):
+            key = _entry_sort_key(e)
+            # new entries are almost always the newest, so this stops near the top
+            i = 0
+            while i < len(self._viewer_entries) and _entry_sort_key(self._viewer_entries[i]) >= key:
+                i += 1
+            self._viewer_entries.insert(i, e)
+            self._entries_listbox.insert(i, self._entry_label(e))
+
     def _get_selected_entry_index(self):
         if not hasattr(self, "_entries_listbox"):
             return None
@@ -298,13 +536,15 @@ class HRTJournalApp(ctk.CTk):
         if not messagebox.askyesno("Delete entry", f"Delete {ts}? This cannot be undone."):
             return
 
-        try:
-            self.data["entries"].remove(entry)
-        except ValueError:
-            t = entry.get("timestamp")
-            self.data["entries"] = [e for e in (self.data.get("entries") or []) if e.get("timestamp") != t]
+        def _remove(data):
+            try:
+                data["entries"].remove(entry)
+            except ValueError:
+                t = entry.get("timestamp")
+                data["entries"] = [e for e in (data.get("entries") or []) if e.get("timestamp") != t]
 
-        save_data(self.data)
+        if not self._commit(_remove):
+            return
         self._refresh_entries_list()
 
     # ---------- MOOD TAB ----------
@@ -351,8 +591,10 @@ class HRTJournalApp(ctk.CTk):
             "euphoria": self.eup_slider.get(),
             "body_notes": self.body_text.get("1.0", "end").strip()
         }
-        self.data["mood_snapshots"].append(snapshot)
-        save_data(self.data)
+        if not self._commit(lambda data: data["mood_snapshots"].append(snapshot)):
+            return
+        self._committed["body_text"] = self.body_text.get("1.0", "end-1c")
+        self._flush_draft()
         self.title("Trans Journal  –  Mood Saved")
 
     # ---------- IDENTITY TAB ----------
@@ -390,13 +632,14 @@ class HRTJournalApp(ctk.CTk):
         self.affirm_text.insert("1.0", ident.get("affirmations", ""))
 
     def save_identity(self):
-        self.data["identity"] = {
+        identity = {
             "name": self.name_entry.get().strip(),
             "pronouns": self.pronoun_entry.get().strip(),
             "labels": self.labels_text.get("1.0", "end").strip(),
             "affirmations": self.affirm_text.get("1.0", "end").strip()
         }
-        save_data(self.data)
+        if not self._commit(lambda data: data.update(identity=identity)):
+            return
         self.title("Trans Journal  –  Identity Saved")
 
     # ---------- RESOURCES TAB ----------
@@ -420,8 +663,9 @@ class HRTJournalApp(ctk.CTk):
         save_btn.grid(row=2, column=0, padx=5, pady=10, sticky="ew")
 
     def save_resources(self):
-        self.data["resources"] = self.resources_text.get("1.0", "end").strip()
-        save_data(self.data)
+        resources = self.resources_text.get("1.0", "end").strip()
+        if not self._commit(lambda data: data.update(resources=resources)):
+            return
         self.title("Trans Journal  –  Resources Saved")
 
     # ---------- SETTINGS TAB ----------
@@ -431,16 +675,22 @@ class HRTJournalApp(ctk.CTk):
         hide_label = ctk.CTkLabel(
             self.tab_settings,
             text="Quick hide clears visible text and switches to this tab.\n"
+                 "Unsaved text is kept as a draft and restored next time you open the journal.\n"
                  "You can extend this with a lock screen or neutral cover.",
             justify="left"
         )
         hide_label.grid(row=0, column=0, padx=5, pady=10, sticky="w")
 
     def quick_hide(self):
+        # Keep what was typed in the draft file, it comes back on next launch
         try:
+            text = self.today_text.get("1.0", "end-1c")
+            if text.strip() and text != self._committed.get("today_text"):
+                self._hidden_text = "\n\n".join(t for t in (self._hidden_text, text) if t.strip())
             self.today_text.delete("1.0", "end")
         except Exception:
             pass
+        self._flush_draft()
         self.tabview.set("Settings")
         self.title("Notes")
 
@@ -0,0 +1,29 @@
+import journal
+
+
+def test_update_data_replays_after_external_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "DATA_FILE", str(tmp_path / "data.json"))
+    mine, my_version = journal.load_data_versioned()
+    theirs, their_version = journal.load_data_versioned()
+
+    theirs, their_version, reloaded = journal.update_data(
+        theirs, their_version, lambda d: d["entries"].append({"text": "theirs"}))
+    assert not reloaded
+
+    mine, my_version, reloaded = journal.update_data(
+        mine, my_version, lambda d: d["entries"].append({"text": "mine"}))
+    assert reloaded
+    assert [e["text"] for e in mine["entries"]] == ["theirs", "mine"]
+
+    on_disk, version = journal.load_data_versioned()
+    assert on_disk["entries"] == mine["entries"]
+    assert version == my_version
+
+
+def test_update_data_skips_reload_when_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "DATA_FILE", str(tmp_path / "data.json"))
+    data, version = journal.load_data_versioned()
+    data, version, _ = journal.update_data(data, version, lambda d: d.update(resources="a"))
+    data, version, reloaded = journal.update_data(data, version, lambda d: d.update(resources="b"))
+    assert not reloaded
+    assert journal.load_data_versioned()[0]["resources"] == "b"